@@ -1,4 +1,4 @@
-import uuid
+import secrets
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
@@ -18,7 +18,7 @@ def anonymous_installation_id() -> str:
     if not ai_id_path.exists():
         ai_id_path.parent.mkdir(parents=True, exist_ok=True)
         with open(ai_id_path, "w") as f:
-            ai_id = uuid.uuid4().hex
+            ai_id = secrets.token_hex(16)
             f.write(ai_id)
     else:
         with open(ai_id_path, "r") as f:
@@ -3,6 +3,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
 import botocore.client
+import botocore.config
 import botocore.exceptions
 from pydantic import ValidationError
 
@@ -36,6 +37,15 @@ from dstack._internal.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Provisioning issues AWS calls from multiple threads, so raise the
+# connection pool limit above botocore's default of 10 and let adaptive
+# retries absorb throttling instead of failing fast.
+_CLIENT_CONFIG = botocore.config.Config(
+    retries={"mode": "adaptive", "max_attempts": 10},
+    max_pool_connections=50,
+    tcp_keepalive=True,
+)
+
 
 class GatewayAWSBackendData(CoreModel):
     lb_arn: str
@@ -78,7 +88,10 @@ class AWSCompute(Compute):
             future_to_region = {}
             for region in regions:
                 future = executor.submit(
-                    get_quotas, self.session.client("service-quotas", region_name=region)
+                    get_quotas,
+                    self.session.client(
+                        "service-quotas", region_name=region, config=_CLIENT_CONFIG
+                    ),
                 )
                 future_to_region[future] = region
             for future in as_completed(future_to_region):
@@ -97,7 +110,7 @@ class AWSCompute(Compute):
     def terminate_instance(
         self, instance_id: str, region: str, backend_data: Optional[str] = None
     ) -> None:
-        client = self.session.client("ec2", region_name=region)
+        client = self.session.client("ec2", region_name=region, config=_CLIENT_CONFIG)
         try:
             client.terminate_instances(InstanceIds=[instance_id])
         except botocore.exceptions.ClientError as e:
@@ -112,8 +125,12 @@ class AWSCompute(Compute):
         instance_config: InstanceConfiguration,
     ) -> JobProvisioningData:
         project_name = instance_config.project_name
-        ec2 = self.session.resource("ec2", region_name=instance_offer.region)
-        ec2_client = self.session.client("ec2", region_name=instance_offer.region)
+        ec2 = self.session.resource(
+            "ec2", region_name=instance_offer.region, config=_CLIENT_CONFIG
+        )
+        ec2_client = self.session.client(
+            "ec2", region_name=instance_offer.region, config=_CLIENT_CONFIG
+        )
         allocate_public_ip = self.config.allocate_public_ips
 
         tags = [
@@ -202,8 +219,10 @@ class AWSCompute(Compute):
         self,
         configuration: GatewayComputeConfiguration,
     ) -> LaunchedGatewayInfo:
-        ec2 = self.session.resource("ec2", region_name=configuration.region)
-        ec2_client = self.session.client("ec2", region_name=configuration.region)
+        ec2 = self.session.resource("ec2", region_name=configuration.region, config=_CLIENT_CONFIG)
+        ec2_client = self.session.client(
+            "ec2", region_name=configuration.region, config=_CLIENT_CONFIG
+        )
 
         tags = [
             {"Key": "Name", "Value": configuration.instance_name},
@@ -250,7 +269,9 @@ class AWSCompute(Compute):
                 ip_address=ip_address,
             )
 
-        elb_client = self.session.client("elbv2", region_name=configuration.region)
+        elb_client = self.session.client(
+            "elbv2", region_name=configuration.region, config=_CLIENT_CONFIG
+        )
 
         if len(subnets_ids) < 2:
             raise ComputeError(
@@ -353,7 +374,9 @@ class AWSCompute(Compute):
                 configuration.instance_name,
             )
 
-        elb_client = self.session.client("elbv2", region_name=configuration.region)
+        elb_client = self.session.client(
+            "elbv2", region_name=configuration.region, config=_CLIENT_CONFIG
+        )
 
         logger.debug("Deleting ALB resources for gateway %s...", configuration.instance_name)
         elb_client.delete_listener(ListenerArn=backend_data_parsed.listener_arn)
@@ -383,10 +406,13 @@ def get_vpc_id_subnet_id_or_error(
     region: str,
     allocate_public_ip: bool,
 ) -> Tuple[str, List[str]]:
+    account_key = _get_account_cache_key(config)
     if config.vpc_ids is not None:
         vpc_id = config.vpc_ids.get(region)
         if vpc_id is not None:
-            vpc = aws_resources.get_vpc_by_vpc_id(ec2_client=ec2_client, vpc_id=vpc_id)
+            vpc = aws_resources.get_vpc_by_vpc_id(
+                ec2_client=ec2_client, vpc_id=vpc_id, account_key=account_key
+            )
             if vpc is None:
                 raise ComputeError(f"Failed to find VPC {vpc_id} in region {region}")
             subnets_ids = aws_resources.get_subnets_ids_for_vpc(
@@ -407,24 +433,38 @@ def get_vpc_id_subnet_id_or_error(
         vpc_name=config.vpc_name,
         region=region,
         allocate_public_ip=allocate_public_ip,
+        account_key=account_key,
     )
 
 
+def _get_account_cache_key(config: AWSConfig) -> str:
+    """
+    Distinguishes backends of different AWS accounts sharing a region in the
+    process-global VPC cache. Backends with default credentials all resolve
+    to the process environment's account.
+    """
+    if is_core_model_instance(config.creds, AWSAccessKeyCreds):
+        return config.creds.access_key
+    return "default"
+
+
 def _get_vpc_id_subnet_id_by_vpc_name_or_error(
     ec2_client: botocore.client.BaseClient,
     vpc_name: Optional[str],
     region: str,
     allocate_public_ip: bool,
+    account_key: str,
 ) -> Tuple[str, List[str]]:
     if vpc_name is not None:
         vpc_id = aws_resources.get_vpc_id_by_name(
             ec2_client=ec2_client,
             vpc_name=vpc_name,
+            account_key=account_key,
         )
         if vpc_id is None:
             raise ComputeError(f"No VPC named {vpc_name} in region {region}")
     else:
-        vpc_id = aws_resources.get_default_vpc_id(ec2_client=ec2_client)
+        vpc_id = aws_resources.get_default_vpc_id(ec2_client=ec2_client, account_key=account_key)
         if vpc_id is None:
             raise ComputeError(f"No default VPC in region {region}")
     subnets_ids = aws_resources.get_subnets_ids_for_vpc(
@@ -1,26 +1,122 @@
-from typing import Any, Dict, List, Optional
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 import botocore.client
 import botocore.exceptions
+from cachetools import TTLCache, cached
 
 import dstack.version as version
 from dstack._internal.core.errors import ComputeResourceNotFoundError
 
+# The dstack AMI names, resolved once at import time
+_IMAGE_NAME = f"dstack-{version.base_image}"
+_CUDA_IMAGE_NAME = f"dstack-cuda-{version.base_image}"
 
+# The account that publishes the dstack AMIs
+DSTACK_IMAGES_OWNER_ACCOUNT_ID = "142421590066"
+# The Canonical account that publishes the official Ubuntu AMIs
+UBUNTU_IMAGES_OWNER_ACCOUNT_ID = "099720109477"
+
+# The static skeleton of the create_instances request; the per-call fields
+# are filled into a deep copy in create_instances_struct
+_INSTANCES_STRUCT_PROTOTYPE = {
+    "BlockDeviceMappings": [
+        {
+            "DeviceName": "/dev/sda1",
+            "Ebs": {
+                "VolumeType": "gp2",
+            },
+        }
+    ],
+    "MinCount": 1,
+    "MaxCount": 1,
+}
+_SPOT_MARKET_OPTIONS = {
+    "MarketType": "spot",
+    "SpotOptions": {
+        "SpotInstanceType": "one-time",
+        "InstanceInterruptionBehavior": "terminate",
+    },
+}
+
+# Static security group rule payloads, built once at import time.
+# Rules that reference the security group itself are built per call.
+_SSH_INGRESS_RULE = {
+    "FromPort": 22,
+    "ToPort": 22,
+    "IpProtocol": "tcp",
+    "IpRanges": [{"CidrIp": "0.0.0.0/0"}],
+}
+_ALLOW_ALL_EGRESS_RULE = {"IpProtocol": "-1"}
+_GATEWAY_INGRESS_RULE = {
+    "FromPort": 0,
+    "ToPort": 65535,
+    "IpProtocol": "tcp",
+    "IpRanges": [{"CidrIp": "0.0.0.0/0"}],
+}
+
+# Resolved AMI ids rarely change, so cache them to avoid calling
+# `describe_images` on every provisioning request. Provisioning runs in
+# multiple threads and TTLCache is not thread-safe, so every cache gets
+# a lock shared by all its users.
+_image_id_cache = TTLCache(maxsize=64, ttl=300)
+_image_id_cache_lock = threading.Lock()
+_gateway_image_id_cache = TTLCache(maxsize=64, ttl=300)
+_gateway_image_id_cache_lock = threading.Lock()
+# All dstack security groups of a project are prefetched with a single
+# tag-filtered `describe_security_groups` call and cached per (region, project).
+_security_groups_cache = TTLCache(maxsize=64, ttl=300)
+_security_groups_cache_lock = threading.Lock()
+# VPCs are effectively immutable for a server session, so cache the
+# `describe_vpcs` lookups. The cache is process-global while different
+# backends may use different AWS accounts in the same region, so callers
+# pass an `account_key` derived from their credentials as a discriminator.
+_vpc_cache = TTLCache(maxsize=128, ttl=300)
+_vpc_cache_lock = threading.Lock()
+
+
+def clear_image_cache():
+    with _image_id_cache_lock:
+        _image_id_cache.clear()
+    with _gateway_image_id_cache_lock:
+        _gateway_image_id_cache.clear()
+
+
+def clear_security_groups_cache():
+    with _security_groups_cache_lock:
+        _security_groups_cache.clear()
+
+
+def clear_vpc_cache():
+    with _vpc_cache_lock:
+        _vpc_cache.clear()
+
+
+@cached(
+    cache=_image_id_cache,
+    key=lambda ec2_client, cuda: (ec2_client.meta.region_name, cuda),
+    lock=_image_id_cache_lock,
+)
 def get_image_id(ec2_client: botocore.client.BaseClient, cuda: bool) -> str:
-    image_name = (
-        f"dstack-{version.base_image}" if not cuda else f"dstack-cuda-{version.base_image}"
-    )
+    image_name = _CUDA_IMAGE_NAME if cuda else _IMAGE_NAME
 
-    response = ec2_client.describe_images(Filters=[{"Name": "name", "Values": [image_name]}])
-    images = sorted(
-        (i for i in response["Images"] if i["State"] == "available"),
-        key=lambda i: i["CreationDate"],
-        reverse=True,
+    # Restricting Owners lets the service use the owner index instead of
+    # scanning the whole public AMI catalog by name
+    pages = ec2_client.get_paginator("describe_images").paginate(
+        Filters=[{"Name": "name", "Values": [image_name]}],
+        Owners=[DSTACK_IMAGES_OWNER_ACCOUNT_ID],
     )
-    if not images:
+    try:
+        image = max(
+            (i for page in pages for i in page["Images"] if i["State"] == "available"),
+            key=lambda i: i["CreationDate"],
+        )
+    except ValueError:
         raise ComputeResourceNotFoundError()
-    return images[0]["ImageId"]
+    return image["ImageId"]
 
 
 def create_security_group(
@@ -28,69 +124,56 @@ def create_security_group(
     project_id: str,
     vpc_id: Optional[str],
 ) -> str:
-    security_group_name = "dstack_security_group_" + project_id.replace("-", "_").lower()
-    describe_security_groups_filters = [
-        {
-            "Name": "group-name",
-            "Values": [security_group_name],
-        },
-    ]
-    if vpc_id is not None:
-        describe_security_groups_filters.append(
-            {
-                "Name": "vpc-id",
-                "Values": [vpc_id],
-            }
-        )
-    response = ec2_client.describe_security_groups(Filters=describe_security_groups_filters)
-    if response.get("SecurityGroups"):
-        security_group = response["SecurityGroups"][0]
-    else:
-        create_security_group_kwargs = {}
-        if vpc_id is not None:
-            create_security_group_kwargs["VpcId"] = vpc_id
-        security_group = ec2_client.create_security_group(
-            Description="Generated by dstack",
-            GroupName=security_group_name,
-            TagSpecifications=[
-                {
-                    "ResourceType": "security-group",
-                    "Tags": [
-                        {"Key": "owner", "Value": "dstack"},
-                        {"Key": "dstack_project", "Value": project_id},
-                    ],
-                },
+    security_group_name = "dstack_security_group_" + _sanitize_project_id(project_id)
+    security_group = _get_security_group(
+        ec2_client=ec2_client,
+        project_id=project_id,
+        security_group_name=security_group_name,
+        vpc_id=vpc_id,
+    )
+    if security_group is None:
+        security_group = _create_security_group(
+            ec2_client=ec2_client,
+            project_id=project_id,
+            security_group_name=security_group_name,
+            vpc_id=vpc_id,
+            tags=[
+                {"Key": "owner", "Value": "dstack"},
+                {"Key": "dstack_project", "Value": project_id},
             ],
-            **create_security_group_kwargs,
         )
     security_group_id = security_group["GroupId"]
 
-    _add_ingress_security_group_rule_if_missing(
-        ec2_client=ec2_client,
-        security_group=security_group,
-        security_group_id=security_group_id,
-        rule={
-            "FromPort": 22,
-            "ToPort": 22,
-            "IpProtocol": "tcp",
-            "IpRanges": [{"CidrIp": "0.0.0.0/0"}],
-        },
-    )
-    _add_ingress_security_group_rule_if_missing(
-        ec2_client=ec2_client,
-        security_group=security_group,
-        security_group_id=security_group_id,
-        rule={
-            "IpProtocol": "-1",
-            "UserIdGroupPairs": [{"GroupId": security_group_id}],
-        },
-    )
-    _add_egress_security_group_rule_if_missing(
-        ec2_client=ec2_client,
-        security_group=security_group,
-        security_group_id=security_group_id,
-        rule={"IpProtocol": "-1"},
-    )
+    # The rules are independent, so add them in parallel to overlap round trips
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(
+                _add_ingress_security_group_rule_if_missing,
+                ec2_client=ec2_client,
+                security_group=security_group,
+                security_group_id=security_group_id,
+                rule=_SSH_INGRESS_RULE,
+            ),
+            executor.submit(
+                _add_ingress_security_group_rule_if_missing,
+                ec2_client=ec2_client,
+                security_group=security_group,
+                security_group_id=security_group_id,
+                rule={
+                    "IpProtocol": "-1",
+                    "UserIdGroupPairs": [{"GroupId": security_group_id}],
+                },
+            ),
+            executor.submit(
+                _add_egress_security_group_rule_if_missing,
+                ec2_client=ec2_client,
+                security_group=security_group,
+                security_group_id=security_group_id,
+                rule=_ALLOW_ALL_EGRESS_RULE,
+            ),
+        ]
+        for future in as_completed(futures):
+            future.result()
     return security_group_id
 
 
@@ -106,38 +189,21 @@ def create_instances_struct(
     subnet_id: Optional[str] = None,
     allocate_public_ip: bool = True,
 ) -> Dict[str, Any]:
-    struct = dict(
-        BlockDeviceMappings=[
-            {
-                "DeviceName": "/dev/sda1",
-                "Ebs": {
-                    "VolumeSize": disk_size,
-                    "VolumeType": "gp2",
-                },
-            }
-        ],
-        ImageId=image_id,
-        InstanceType=instance_type,
-        MinCount=1,
-        MaxCount=1,
-        UserData=user_data,
-        TagSpecifications=[
-            {
-                "ResourceType": "instance",
-                "Tags": tags,
-            },
-        ],
-    )
+    struct = copy.deepcopy(_INSTANCES_STRUCT_PROTOTYPE)
+    struct["BlockDeviceMappings"][0]["Ebs"]["VolumeSize"] = disk_size
+    struct["ImageId"] = image_id
+    struct["InstanceType"] = instance_type
+    struct["UserData"] = user_data
+    struct["TagSpecifications"] = [
+        {
+            "ResourceType": "instance",
+            "Tags": tags,
+        },
+    ]
     if iam_instance_profile_arn:
         struct["IamInstanceProfile"] = {"Arn": iam_instance_profile_arn}
     if spot:
-        struct["InstanceMarketOptions"] = {
-            "MarketType": "spot",
-            "SpotOptions": {
-                "SpotInstanceType": "one-time",
-                "InstanceInterruptionBehavior": "terminate",
-            },
-        }
+        struct["InstanceMarketOptions"] = copy.deepcopy(_SPOT_MARKET_OPTIONS)
     # AWS allows specifying either NetworkInterfaces for specific subnet_id
     # or instance-level SecurityGroupIds in case of no specific subnet_id, not both.
     if subnet_id is not None:
@@ -154,8 +220,13 @@ def create_instances_struct(
     return struct
 
 
+@cached(
+    cache=_gateway_image_id_cache,
+    key=lambda ec2_client: (ec2_client.meta.region_name,),
+    lock=_gateway_image_id_cache_lock,
+)
 def get_gateway_image_id(ec2_client: botocore.client.BaseClient) -> str:
-    response = ec2_client.describe_images(
+    pages = ec2_client.get_paginator("describe_images").paginate(
         Filters=[
             {
                 "Name": "name",
@@ -166,8 +237,15 @@ def get_gateway_image_id(ec2_client: botocore.client.BaseClient) -> str:
                 "Values": ["amazon"],
             },
         ],
+        Owners=[UBUNTU_IMAGES_OWNER_ACCOUNT_ID],
     )
-    image = sorted(response["Images"], key=lambda i: i["CreationDate"], reverse=True)[0]
+    try:
+        image = max(
+            (i for page in pages for i in page["Images"]),
+            key=lambda i: i["CreationDate"],
+        )
+    except ValueError:
+        raise ComputeResourceNotFoundError()
     return image["ImageId"]
 
 
@@ -176,65 +254,55 @@ def create_gateway_security_group(
     project_id: str,
     vpc_id: Optional[str],
 ) -> str:
-    security_group_name = "dstack_gw_sg_" + project_id.replace("-", "_").lower()
-    describe_security_groups_filters = [
-        {
-            "Name": "group-name",
-            "Values": [security_group_name],
-        },
-    ]
-    if vpc_id is not None:
-        describe_security_groups_filters.append(
-            {
-                "Name": "vpc-id",
-                "Values": [vpc_id],
-            }
-        )
-    response = ec2_client.describe_security_groups(Filters=describe_security_groups_filters)
-    if response.get("SecurityGroups"):
-        return response["SecurityGroups"][0]["GroupId"]
-    create_security_group_kwargs = {}
-    if vpc_id is not None:
-        create_security_group_kwargs["VpcId"] = vpc_id
-    security_group = ec2_client.create_security_group(
-        Description="Generated by dstack",
-        GroupName=security_group_name,
-        TagSpecifications=[
-            {
-                "ResourceType": "security-group",
-                "Tags": [
-                    {"Key": "owner", "Value": "dstack"},
-                    {"Key": "role", "Value": "gateway"},
-                    {"Key": "dstack_project", "Value": project_id},
-                ],
-            },
+    security_group_name = "dstack_gw_sg_" + _sanitize_project_id(project_id)
+    security_group = _get_security_group(
+        ec2_client=ec2_client,
+        project_id=project_id,
+        security_group_name=security_group_name,
+        vpc_id=vpc_id,
+    )
+    if security_group is not None:
+        return security_group["GroupId"]
+    security_group = _create_security_group(
+        ec2_client=ec2_client,
+        project_id=project_id,
+        security_group_name=security_group_name,
+        vpc_id=vpc_id,
+        tags=[
+            {"Key": "owner", "Value": "dstack"},
+            {"Key": "role", "Value": "gateway"},
+            {"Key": "dstack_project", "Value": project_id},
         ],
-        **create_security_group_kwargs,
     )
     group_id = security_group["GroupId"]
 
-    ec2_client.authorize_security_group_ingress(
-        GroupId=group_id,
-        IpPermissions=[
-            {
-                "FromPort": 0,
-                "ToPort": 65535,
-                "IpProtocol": "tcp",
-                "IpRanges": [{"CidrIp": "0.0.0.0/0"}],
-            }
-        ],
+    _authorize_security_group_rule(
+        authorize=ec2_client.authorize_security_group_ingress,
+        security_group_id=group_id,
+        rule=_GATEWAY_INGRESS_RULE,
     )
-
-    ec2_client.authorize_security_group_egress(
-        GroupId=group_id,
-        IpPermissions=[{"IpProtocol": "-1"}],
+    _authorize_security_group_rule(
+        authorize=ec2_client.authorize_security_group_egress,
+        security_group_id=group_id,
+        rule=_ALLOW_ALL_EGRESS_RULE,
     )
     return group_id
 
 
+@cached(
+    cache=_vpc_cache,
+    key=lambda ec2_client, vpc_name, account_key=None: (
+        account_key,
+        ec2_client.meta.region_name,
+        "name",
+        vpc_name,
+    ),
+    lock=_vpc_cache_lock,
+)
 def get_vpc_id_by_name(
     ec2_client: botocore.client.BaseClient,
     vpc_name: str,
+    account_key: Optional[str] = None,
 ) -> Optional[str]:
     response = ec2_client.describe_vpcs(Filters=[{"Name": "tag:Name", "Values": [vpc_name]}])
     if len(response["Vpcs"]) == 0:
@@ -242,14 +310,40 @@ def get_vpc_id_by_name(
     return response["Vpcs"][0]["VpcId"]
 
 
-def get_default_vpc_id(ec2_client: botocore.client.BaseClient) -> Optional[str]:
+@cached(
+    cache=_vpc_cache,
+    key=lambda ec2_client, account_key=None: (
+        account_key,
+        ec2_client.meta.region_name,
+        "default",
+    ),
+    lock=_vpc_cache_lock,
+)
+def get_default_vpc_id(
+    ec2_client: botocore.client.BaseClient,
+    account_key: Optional[str] = None,
+) -> Optional[str]:
     response = ec2_client.describe_vpcs(Filters=[{"Name": "isDefault", "Values": ["true"]}])
     if "Vpcs" in response and len(response["Vpcs"]) > 0:
         return response["Vpcs"][0]["VpcId"]
     return None
 
 
-def get_vpc_by_vpc_id(ec2_client: botocore.client.BaseClient, vpc_id: str) -> Optional[str]:
+@cached(
+    cache=_vpc_cache,
+    key=lambda ec2_client, vpc_id, account_key=None: (
+        account_key,
+        ec2_client.meta.region_name,
+        "id",
+        vpc_id,
+    ),
+    lock=_vpc_cache_lock,
+)
+def get_vpc_by_vpc_id(
+    ec2_client: botocore.client.BaseClient,
+    vpc_id: str,
+    account_key: Optional[str] = None,
+) -> Optional[str]:
     response = ec2_client.describe_vpcs(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
     if "Vpcs" in response and len(response["Vpcs"]) > 0:
         return response["Vpcs"][0]
@@ -265,29 +359,143 @@ def get_subnets_ids_for_vpc(
     If `allocate_public_ip` is True, returns public subnets found in the VPC.
     If `allocate_public_ip` is False, returns subnets with NAT found in the VPC.
     """
+    if allocate_public_ip:
+        # Fast path: subnets that auto-assign public IPs are public in practice,
+        # and the filter is evaluated server-side. Only fall back to walking the
+        # route tables when no subnet auto-assigns.
+        subnets = _get_subnets_by_vpc_id(
+            ec2_client=ec2_client,
+            vpc_id=vpc_id,
+            auto_assign_public_ip=True,
+        )
+        if len(subnets) > 0:
+            return [subnet["SubnetId"] for subnet in subnets]
     subnets = _get_subnets_by_vpc_id(ec2_client=ec2_client, vpc_id=vpc_id)
     if len(subnets) == 0:
         return []
+    # Fetch all the VPC's route tables once and classify the subnets locally
+    # instead of issuing describe_route_tables calls per subnet
+    route_tables_by_subnet, main_route_table = _load_route_tables(
+        ec2_client=ec2_client, vpc_id=vpc_id
+    )
     subnets_ids = []
     for subnet in subnets:
         subnet_id = subnet["SubnetId"]
         if allocate_public_ip:
-            is_public_subnet = _is_public_subnet(
-                ec2_client=ec2_client, vpc_id=vpc_id, subnet_id=subnet_id
+            is_suitable = _is_public_subnet(
+                subnet_id=subnet_id,
+                route_tables_by_subnet=route_tables_by_subnet,
+                main_route_table=main_route_table,
             )
-            if is_public_subnet:
-                subnets_ids.append(subnet_id)
         else:
-            subnet_behind_nat = _is_subnet_behind_nat(
-                ec2_client=ec2_client,
-                vpc_id=vpc_id,
+            is_suitable = _is_subnet_behind_nat(
                 subnet_id=subnet_id,
+                route_tables_by_subnet=route_tables_by_subnet,
+                main_route_table=main_route_table,
             )
-            if subnet_behind_nat:
-                subnets_ids.append(subnet_id)
+        if is_suitable:
+            subnets_ids.append(subnet_id)
     return subnets_ids
 
 
+@lru_cache(maxsize=256)
+def _sanitize_project_id(project_id: str) -> str:
+    return project_id.replace("-", "_").lower()
+
+
+@cached(
+    cache=_security_groups_cache,
+    key=lambda ec2_client, project_id: (ec2_client.meta.region_name, project_id),
+    lock=_security_groups_cache_lock,
+)
+def _get_project_security_groups(
+    ec2_client: botocore.client.BaseClient,
+    project_id: str,
+) -> List[Dict]:
+    pages = ec2_client.get_paginator("describe_security_groups").paginate(
+        Filters=[{"Name": "tag:dstack_project", "Values": [project_id]}]
+    )
+    return [security_group for page in pages for security_group in page["SecurityGroups"]]
+
+
+def _get_security_group(
+    ec2_client: botocore.client.BaseClient,
+    project_id: str,
+    security_group_name: str,
+    vpc_id: Optional[str],
+) -> Optional[Dict]:
+    for security_group in _get_project_security_groups(ec2_client, project_id):
+        if security_group["GroupName"] != security_group_name:
+            continue
+        if vpc_id is not None and security_group.get("VpcId") != vpc_id:
+            continue
+        return security_group
+    return None
+
+
+def _create_security_group(
+    ec2_client: botocore.client.BaseClient,
+    project_id: str,
+    security_group_name: str,
+    vpc_id: Optional[str],
+    tags: List[Dict[str, str]],
+) -> Dict:
+    create_security_group_kwargs = {}
+    if vpc_id is not None:
+        create_security_group_kwargs["VpcId"] = vpc_id
+    try:
+        security_group = ec2_client.create_security_group(
+            Description="Generated by dstack",
+            GroupName=security_group_name,
+            TagSpecifications=[
+                {
+                    "ResourceType": "security-group",
+                    "Tags": tags,
+                },
+            ],
+            **create_security_group_kwargs,
+        )
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] != "InvalidGroup.Duplicate":
+            raise
+        # The group exists but was not prefetched, e.g. it's not tagged
+        # with dstack_project or was created concurrently.
+        security_group = _describe_security_group_by_name(
+            ec2_client=ec2_client,
+            security_group_name=security_group_name,
+            vpc_id=vpc_id,
+        )
+        if security_group is None:
+            raise
+    with _security_groups_cache_lock:
+        _security_groups_cache.pop((ec2_client.meta.region_name, project_id), None)
+    return security_group
+
+
+def _describe_security_group_by_name(
+    ec2_client: botocore.client.BaseClient,
+    security_group_name: str,
+    vpc_id: Optional[str],
+) -> Optional[Dict]:
+    describe_security_groups_filters = [
+        {
+            "Name": "group-name",
+            "Values": [security_group_name],
+        },
+    ]
+    if vpc_id is not None:
+        describe_security_groups_filters.append(
+            {
+                "Name": "vpc-id",
+                "Values": [vpc_id],
+            }
+        )
+    response = ec2_client.describe_security_groups(Filters=describe_security_groups_filters)
+    if response.get("SecurityGroups"):
+        return response["SecurityGroups"][0]
+    return None
+
+
 def _add_ingress_security_group_rule_if_missing(
     ec2_client: botocore.client.BaseClient,
     security_group: Dict,
@@ -296,11 +504,11 @@ def _add_ingress_security_group_rule_if_missing(
 ) -> bool:
     if _rule_exists(rule, security_group.get("IpPermissions", [])):
         return False
-    ec2_client.authorize_security_group_ingress(
-        GroupId=security_group_id,
-        IpPermissions=[rule],
+    return _authorize_security_group_rule(
+        authorize=ec2_client.authorize_security_group_ingress,
+        security_group_id=security_group_id,
+        rule=rule,
     )
-    return True
 
 
 def _add_egress_security_group_rule_if_missing(
@@ -311,10 +519,28 @@ def _add_egress_security_group_rule_if_missing(
 ) -> bool:
     if _rule_exists(rule, security_group.get("IpPermissionsEgress", [])):
         return False
-    ec2_client.authorize_security_group_egress(
-        GroupId=security_group_id,
-        IpPermissions=[rule],
+    return _authorize_security_group_rule(
+        authorize=ec2_client.authorize_security_group_egress,
+        security_group_id=security_group_id,
+        rule=rule,
     )
+
+
+def _authorize_security_group_rule(
+    authorize,
+    security_group_id: str,
+    rule: Dict,
+) -> bool:
+    try:
+        authorize(
+            GroupId=security_group_id,
+            IpPermissions=[rule],
+        )
+    except botocore.exceptions.ClientError as e:
+        # The cached security group may not reflect recently added rules
+        if e.response["Error"]["Code"] != "InvalidPermission.Duplicate":
+            raise
+        return False
     return True
 
 
@@ -323,93 +549,111 @@ def _rule_exists(rule: Dict, rules: List[Dict]) -> bool:
     Rule exists if there are an existing rule that includes all the keys with the same values.
     Note that the existing rule may have keys missing from the rule.
     """
-    return any(_is_subset(rule, other_rule) for other_rule in rules)
+    frozen_rule = _freeze(rule)
+    return any(_freeze(_project(other_rule, rule)) == frozen_rule for other_rule in rules)
 
 
-def _is_subset(subset, superset) -> bool:
+def _project(superset, subset):
+    """
+    Projects `superset` onto the keys present in `subset`, so that the two
+    can be compared by their frozen forms.
+    """
     if isinstance(subset, dict) and isinstance(superset, dict):
-        return all(k in superset and _is_subset(v, superset[k]) for k, v in subset.items())
-    if isinstance(subset, list) and isinstance(superset, list):
-        return len(subset) == len(superset) and all(
-            _is_subset(v1, v2) for v1, v2 in zip(subset, superset)
-        )
-    return subset == superset
+        return {k: _project(superset[k], v) for k, v in subset.items() if k in superset}
+    if isinstance(subset, list) and isinstance(superset, list) and len(subset) == len(superset):
+        return [_project(v2, v1) for v1, v2 in zip(subset, superset)]
+    return superset
+
+
+def _freeze(obj):
+    if isinstance(obj, dict):
+        return frozenset((k, _freeze(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
 
 
 def _get_subnets_by_vpc_id(
     ec2_client: botocore.client.BaseClient,
     vpc_id: str,
+    auto_assign_public_ip: bool = False,
 ) -> List[Dict]:
-    response = ec2_client.describe_subnets(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
-    return response["Subnets"]
+    filters = [{"Name": "vpc-id", "Values": [vpc_id]}]
+    if auto_assign_public_ip:
+        filters.append({"Name": "map-public-ip-on-launch", "Values": ["true"]})
+    pages = ec2_client.get_paginator("describe_subnets").paginate(Filters=filters)
+    return [subnet for page in pages for subnet in page["Subnets"]]
 
 
-def _is_public_subnet(
+def _load_route_tables(
     ec2_client: botocore.client.BaseClient,
     vpc_id: str,
+) -> Tuple[Dict[str, List[Dict]], Optional[Dict]]:
+    """
+    Returns the VPC's route tables grouped by explicitly associated subnet id,
+    along with the VPC's main route table.
+    """
+    pages = ec2_client.get_paginator("describe_route_tables").paginate(
+        Filters=[{"Name": "vpc-id", "Values": [vpc_id]}]
+    )
+    route_tables = [route_table for page in pages for route_table in page["RouteTables"]]
+    route_tables_by_subnet = {}
+    main_route_table = None
+    for route_table in route_tables:
+        for association in route_table.get("Associations", []):
+            if association.get("Main"):
+                main_route_table = route_table
+            elif "SubnetId" in association:
+                route_tables_by_subnet.setdefault(association["SubnetId"], []).append(route_table)
+    return route_tables_by_subnet, main_route_table
+
+
+def _get_subnet_route_tables(
+    subnet_id: str,
+    route_tables_by_subnet: Dict[str, List[Dict]],
+    main_route_table: Optional[Dict],
+) -> List[Dict]:
+    # Main route table controls the routing of all subnets
+    # that are not explicitly associated with any other route table.
+    route_tables = route_tables_by_subnet.get(subnet_id)
+    if route_tables is not None:
+        return route_tables
+    if main_route_table is not None:
+        return [main_route_table]
+    return []
+
+
+def _is_public_subnet(
     subnet_id: str,
+    route_tables_by_subnet: Dict[str, List[Dict]],
+    main_route_table: Optional[Dict],
 ) -> bool:
     # Public subnet – The subnet has a direct route to an internet gateway.
     # Private subnet – The subnet does not have a direct route to an internet gateway.
-
-    # Check explicitly associated route tables
-    response = ec2_client.describe_route_tables(
-        Filters=[{"Name": "association.subnet-id", "Values": [subnet_id]}]
+    route_tables = _get_subnet_route_tables(
+        subnet_id=subnet_id,
+        route_tables_by_subnet=route_tables_by_subnet,
+        main_route_table=main_route_table,
     )
-    for route_table in response["RouteTables"]:
-        for route in route_table["Routes"]:
-            if "GatewayId" in route and route["GatewayId"].startswith("igw-"):
-                return True
-
-    # Main route table controls the routing of all subnetes
-    # that are not explicitly associated with any other route table.
-    if len(response["RouteTables"]) > 0:
-        return False
-
-    # Check implicitly associated main route table
-    response = ec2_client.describe_route_tables(
-        Filters=[
-            {"Name": "association.main", "Values": ["true"]},
-            {"Name": "vpc-id", "Values": [vpc_id]},
-        ]
+    return any(
+        (gateway_id := route.get("GatewayId")) and gateway_id.startswith("igw-")
+        for route_table in route_tables
+        for route in route_table["Routes"]
     )
-    for route_table in response["RouteTables"]:
-        for route in route_table["Routes"]:
-            if "GatewayId" in route and route["GatewayId"].startswith("igw-"):
-                return True
-
-    return False
 
 
 def _is_subnet_behind_nat(
-    ec2_client: botocore.client.BaseClient,
-    vpc_id: str,
     subnet_id: str,
+    route_tables_by_subnet: Dict[str, List[Dict]],
+    main_route_table: Optional[Dict],
 ) -> bool:
-    # Check explicitly associated route tables
-    response = ec2_client.describe_route_tables(
-        Filters=[{"Name": "association.subnet-id", "Values": [subnet_id]}]
+    route_tables = _get_subnet_route_tables(
+        subnet_id=subnet_id,
+        route_tables_by_subnet=route_tables_by_subnet,
+        main_route_table=main_route_table,
     )
-    for route_table in response["RouteTables"]:
-        for route in route_table["Routes"]:
-            if "NatGatewayId" in route and route["NatGatewayId"].startswith("nat-"):
-                return True
-
-    # Main route table controls the routing of all subnetes
-    # that are not explicitly associated with any other route table.
-    if len(response["RouteTables"]) > 0:
-        return False
-
-    # Check implicitly associated main route table
-    response = ec2_client.describe_route_tables(
-        Filters=[
-            {"Name": "association.main", "Values": ["true"]},
-            {"Name": "vpc-id", "Values": [vpc_id]},
-        ]
+    return any(
+        (nat_gateway_id := route.get("NatGatewayId")) and nat_gateway_id.startswith("nat-")
+        for route_table in route_tables
+        for route in route_table["Routes"]
     )
-    for route_table in response["RouteTables"]:
-        for route in route_table["Routes"]:
-            if "NatGatewayId" in route and route["NatGatewayId"].startswith("nat-"):
-                return True
-
-    return False
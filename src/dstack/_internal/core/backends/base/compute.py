@@ -2,7 +2,7 @@ import os
 import re
 from abc import ABC, abstractmethod
 from functools import lru_cache
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import git
 import requests
@@ -143,6 +143,11 @@ def get_cloud_config(**config) -> str:
 
 
 def get_shim_pre_start_commands(build: str) -> List[str]:
+    return list(_shim_pre_start_commands(build))
+
+
+@lru_cache()  # The commands only depend on the build
+def _shim_pre_start_commands(build: str) -> Tuple[str, ...]:
     bucket = "dstack-runner-downloads-stgn"
     if settings.DSTACK_VERSION is not None:
         bucket = "dstack-runner-downloads"
@@ -151,18 +156,23 @@ def get_shim_pre_start_commands(build: str) -> List[str]:
 
     dstack_shim_binary_path = "/usr/local/bin/dstack-shim"
 
-    return [
+    return (
         f'sudo curl -s --compressed --connect-timeout 60 --max-time 240 --retry 1 --output {dstack_shim_binary_path} "{url}"',
         f"sudo chmod +x {dstack_shim_binary_path}",
         f"sudo mkdir {DSTACK_WORKING_DIR} -p",
-    ]
+    )
 
 
 def get_run_shim_script() -> List[str]:
+    return list(_run_shim_script())
+
+
+@lru_cache()  # settings.DSTACK_VERSION is fixed for the process lifetime
+def _run_shim_script() -> Tuple[str, ...]:
     dev_flag = "" if settings.DSTACK_VERSION is not None else "--dev"
-    return [
+    return (
         f"nohup dstack-shim {dev_flag} docker --keep-container >{DSTACK_WORKING_DIR}/shim.log 2>&1 &",
-    ]
+    )
 
 
 def get_gateway_user_data(authorized_key: str) -> str:
@@ -187,50 +197,66 @@ def get_gateway_user_data(authorized_key: str) -> str:
     )
 
 
+# The static parts of get_docker_commands, built once at import time
+_DOCKER_SETUP_PRE_KEY_COMMANDS = (
+    # note: &> redirection doesn't work in /bin/sh
+    # check in sshd is here, install if not
+    "if ! command -v sshd >/dev/null 2>&1; then apt-get update && DEBIAN_FRONTEND=noninteractive apt-get install -y openssh-server || yum install -y openssh-server; fi",
+    # install curl if necessary
+    "if ! command -v curl >/dev/null 2>&1; then apt-get update && DEBIAN_FRONTEND=noninteractive apt-get install -y curl || yum install -y curl; fi",
+    # prohibit password authentication
+    'sed -i "s/.*PasswordAuthentication.*/PasswordAuthentication no/g" /etc/ssh/sshd_config',
+    # create ssh dirs and add public key
+    "mkdir -p /run/sshd ~/.ssh",
+    "chmod 700 ~/.ssh",
+)
+_DOCKER_SETUP_POST_KEY_COMMANDS = (
+    "chmod 600 ~/.ssh/authorized_keys",
+    # preserve environment variables for SSH clients
+    "env >> ~/.ssh/environment",
+)
+_FIX_PATH_IN_DOT_PROFILE_COMMAND = (
+    "sed -ie '1s@^@export PATH=\"'\"$PATH\"':$PATH\"\\n\\n@' ~/.profile"
+)
+_DOCKER_START_SSHD_COMMANDS = (
+    # regenerate host keys
+    "rm -rf /etc/ssh/ssh_host_*",
+    "ssh-keygen -A > /dev/null",
+    # start sshd
+    "/usr/sbin/sshd -p 10022 -o PermitUserEnvironment=yes",
+)
+
+
 def get_docker_commands(
     authorized_keys: List[str], fix_path_in_dot_profile: bool = True
 ) -> List[str]:
     authorized_keys_content = "\n".join(authorized_keys).strip()
     commands = [
-        # note: &> redirection doesn't work in /bin/sh
-        # check in sshd is here, install if not
-        "if ! command -v sshd >/dev/null 2>&1; then apt-get update && DEBIAN_FRONTEND=noninteractive apt-get install -y openssh-server || yum install -y openssh-server; fi",
-        # install curl if necessary
-        "if ! command -v curl >/dev/null 2>&1; then apt-get update && DEBIAN_FRONTEND=noninteractive apt-get install -y curl || yum install -y curl; fi",
-        # prohibit password authentication
-        'sed -i "s/.*PasswordAuthentication.*/PasswordAuthentication no/g" /etc/ssh/sshd_config',
-        # create ssh dirs and add public key
-        "mkdir -p /run/sshd ~/.ssh",
-        "chmod 700 ~/.ssh",
+        *_DOCKER_SETUP_PRE_KEY_COMMANDS,
         f"echo '{authorized_keys_content}' > ~/.ssh/authorized_keys",
-        "chmod 600 ~/.ssh/authorized_keys",
-        # preserve environment variables for SSH clients
-        "env >> ~/.ssh/environment",
-        "sed -ie '1s@^@export PATH=\"'\"$PATH\"':$PATH\"\\n\\n@' ~/.profile"
-        if fix_path_in_dot_profile
-        else ":",
-        # regenerate host keys
-        "rm -rf /etc/ssh/ssh_host_*",
-        "ssh-keygen -A > /dev/null",
-        # start sshd
-        "/usr/sbin/sshd -p 10022 -o PermitUserEnvironment=yes",
+        *_DOCKER_SETUP_POST_KEY_COMMANDS,
+        _FIX_PATH_IN_DOT_PROFILE_COMMAND if fix_path_in_dot_profile else ":",
+        *_DOCKER_START_SSHD_COMMANDS,
     ]
+    commands += _run_runner_commands(get_dstack_runner_version())
+    return commands
 
+
+@lru_cache()  # The commands only depend on the build
+def _run_runner_commands(build: str) -> Tuple[str, ...]:
     runner = "/usr/local/bin/dstack-runner"
 
-    build = get_dstack_runner_version()
     bucket = "dstack-runner-downloads-stgn"
     if settings.DSTACK_VERSION is not None:
         bucket = "dstack-runner-downloads"
 
     url = f"https://{bucket}.s3.eu-west-1.amazonaws.com/{build}/binaries/dstack-runner-linux-amd64"
 
-    commands += [
+    return (
         f"curl --connect-timeout 60 --max-time 240 --retry 1 --output {runner} {url}",
         f"chmod +x {runner}",
         f"{runner} --log-level 6 start --http-port 10999 --temp-dir /tmp/runner --home-dir /root --working-dir /workflow",
-    ]
-    return commands
+    )
 
 
 @lru_cache()  # Restart the server to find the latest build
@@ -1,4 +1,4 @@
-import uuid
+import secrets
 
 import requests
 import yaml
@@ -45,7 +45,7 @@ class TensorDockAPIClient:
         form = {
             "api_key": self.api_key,
             "api_token": self.api_token,
-            "password": uuid.uuid4().hex,  # we disable the password auth, but it's required
+            "password": secrets.token_hex(16),  # we disable the password auth, but it's required
             "name": instance_name,
             "gpu_count": len(instance.resources.gpus),
             "gpu_model": gpu_model,
@@ -0,0 +1,326 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from dstack._internal.core.backends.aws import resources as aws_resources
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    aws_resources.clear_image_cache()
+    aws_resources.clear_security_groups_cache()
+    aws_resources.clear_vpc_cache()
+    yield
+    aws_resources.clear_image_cache()
+    aws_resources.clear_security_groups_cache()
+    aws_resources.clear_vpc_cache()
+
+
+def _make_ec2_client_mock(region_name: str = "eu-west-1") -> MagicMock:
+    ec2_client = MagicMock()
+    ec2_client.meta.region_name = region_name
+
+    # Route paginated calls through the corresponding describe_* mock,
+    # returning its response as a single page
+    def get_paginator(operation_name: str) -> MagicMock:
+        paginator = MagicMock()
+        operation = getattr(ec2_client, operation_name)
+        paginator.paginate.side_effect = lambda **kwargs: iter([operation(**kwargs)])
+        return paginator
+
+    ec2_client.get_paginator.side_effect = get_paginator
+    return ec2_client
+
+
+class TestGetImageId:
+    def test_caches_image_id_per_region_and_cuda(self):
+        ec2_client = _make_ec2_client_mock()
+        ec2_client.describe_images.return_value = {
+            "Images": [
+                {"ImageId": "ami-1", "State": "available", "CreationDate": "2024-01-01"},
+                {"ImageId": "ami-2", "State": "available", "CreationDate": "2024-02-01"},
+            ]
+        }
+        assert aws_resources.get_image_id(ec2_client, cuda=False) == "ami-2"
+        assert aws_resources.get_image_id(ec2_client, cuda=False) == "ami-2"
+        assert ec2_client.describe_images.call_count == 1
+        aws_resources.get_image_id(ec2_client, cuda=True)
+        assert ec2_client.describe_images.call_count == 2
+
+    def test_does_not_share_cache_between_regions(self):
+        ec2_client_1 = _make_ec2_client_mock("eu-west-1")
+        ec2_client_1.describe_images.return_value = {
+            "Images": [
+                {"ImageId": "ami-1", "State": "available", "CreationDate": "2024-01-01"},
+            ]
+        }
+        ec2_client_2 = _make_ec2_client_mock("us-east-1")
+        ec2_client_2.describe_images.return_value = {
+            "Images": [
+                {"ImageId": "ami-2", "State": "available", "CreationDate": "2024-01-01"},
+            ]
+        }
+        assert aws_resources.get_image_id(ec2_client_1, cuda=False) == "ami-1"
+        assert aws_resources.get_image_id(ec2_client_2, cuda=False) == "ami-2"
+
+
+class TestCreateSecurityGroup:
+    def test_reuses_prefetched_security_group(self):
+        ec2_client = _make_ec2_client_mock()
+        ec2_client.describe_security_groups.return_value = {
+            "SecurityGroups": [
+                {
+                    "GroupId": "sg-1",
+                    "GroupName": "dstack_security_group_main",
+                    "VpcId": "vpc-1",
+                    "IpPermissions": [
+                        {
+                            "FromPort": 22,
+                            "ToPort": 22,
+                            "IpProtocol": "tcp",
+                            "IpRanges": [{"CidrIp": "0.0.0.0/0"}],
+                        },
+                        {
+                            "IpProtocol": "-1",
+                            "UserIdGroupPairs": [{"GroupId": "sg-1"}],
+                        },
+                    ],
+                    "IpPermissionsEgress": [{"IpProtocol": "-1"}],
+                },
+            ]
+        }
+        security_group_id = aws_resources.create_security_group(
+            ec2_client=ec2_client,
+            project_id="main",
+            vpc_id="vpc-1",
+        )
+        assert security_group_id == "sg-1"
+        ec2_client.create_security_group.assert_not_called()
+        ec2_client.authorize_security_group_ingress.assert_not_called()
+        ec2_client.authorize_security_group_egress.assert_not_called()
+        aws_resources.create_security_group(
+            ec2_client=ec2_client,
+            project_id="main",
+            vpc_id="vpc-1",
+        )
+        assert ec2_client.describe_security_groups.call_count == 1
+
+    def test_creates_security_group_and_rules_on_miss(self):
+        ec2_client = _make_ec2_client_mock()
+        ec2_client.describe_security_groups.return_value = {"SecurityGroups": []}
+        ec2_client.create_security_group.return_value = {"GroupId": "sg-1"}
+        security_group_id = aws_resources.create_security_group(
+            ec2_client=ec2_client,
+            project_id="main",
+            vpc_id="vpc-1",
+        )
+        assert security_group_id == "sg-1"
+        ec2_client.create_security_group.assert_called_once()
+        assert ec2_client.authorize_security_group_ingress.call_count == 2
+        ec2_client.authorize_security_group_egress.assert_called_once()
+
+
+class TestRuleExists:
+    def test_exists_when_existing_rule_has_extra_keys(self):
+        rule = {
+            "FromPort": 22,
+            "ToPort": 22,
+            "IpProtocol": "tcp",
+            "IpRanges": [{"CidrIp": "0.0.0.0/0"}],
+        }
+        rules = [
+            {
+                "FromPort": 22,
+                "ToPort": 22,
+                "IpProtocol": "tcp",
+                "IpRanges": [{"CidrIp": "0.0.0.0/0", "Description": "ssh"}],
+                "UserIdGroupPairs": [],
+            },
+        ]
+        assert aws_resources._rule_exists(rule, rules)
+
+    def test_does_not_exist_when_values_differ(self):
+        rule = {
+            "IpProtocol": "-1",
+            "UserIdGroupPairs": [{"GroupId": "sg-1"}],
+        }
+        rules = [
+            {
+                "IpProtocol": "-1",
+                "UserIdGroupPairs": [{"GroupId": "sg-2", "UserId": "123"}],
+            },
+        ]
+        assert not aws_resources._rule_exists(rule, rules)
+
+    def test_does_not_exist_when_list_lengths_differ(self):
+        rule = {"IpRanges": [{"CidrIp": "0.0.0.0/0"}]}
+        rules = [{"IpRanges": [{"CidrIp": "0.0.0.0/0"}, {"CidrIp": "10.0.0.0/8"}]}]
+        assert not aws_resources._rule_exists(rule, rules)
+
+    def test_does_not_exist_when_no_rules(self):
+        assert not aws_resources._rule_exists({"IpProtocol": "-1"}, [])
+
+
+def _describe_subnets_mock(subnets, auto_assign_public_ip_subnets=()):
+    def describe_subnets(Filters):
+        if {"Name": "map-public-ip-on-launch", "Values": ["true"]} in Filters:
+            return {"Subnets": list(auto_assign_public_ip_subnets)}
+        return {"Subnets": list(subnets)}
+
+    return describe_subnets
+
+
+class TestGetSubnetsIdsForVpc:
+    def test_returns_subnets_with_auto_assigned_public_ips(self):
+        ec2_client = _make_ec2_client_mock()
+        ec2_client.describe_subnets.side_effect = _describe_subnets_mock(
+            subnets=[{"SubnetId": "subnet-1"}, {"SubnetId": "subnet-2"}],
+            auto_assign_public_ip_subnets=[{"SubnetId": "subnet-1"}],
+        )
+        subnets_ids = aws_resources.get_subnets_ids_for_vpc(
+            ec2_client=ec2_client,
+            vpc_id="vpc-1",
+            allocate_public_ip=True,
+        )
+        assert subnets_ids == ["subnet-1"]
+        ec2_client.describe_route_tables.assert_not_called()
+
+    def test_classifies_subnets_with_one_route_tables_call(self):
+        ec2_client = _make_ec2_client_mock()
+        ec2_client.describe_subnets.side_effect = _describe_subnets_mock(
+            subnets=[
+                {"SubnetId": "subnet-1"},
+                {"SubnetId": "subnet-2"},
+                {"SubnetId": "subnet-3"},
+            ]
+        )
+        ec2_client.describe_route_tables.return_value = {
+            "RouteTables": [
+                {
+                    "Associations": [{"SubnetId": "subnet-1"}],
+                    "Routes": [{"GatewayId": "igw-1"}],
+                },
+                {
+                    "Associations": [{"SubnetId": "subnet-2"}],
+                    "Routes": [{"NatGatewayId": "nat-1"}],
+                },
+                {
+                    "Associations": [{"Main": True}],
+                    "Routes": [{"GatewayId": "local"}],
+                },
+            ]
+        }
+        subnets_ids = aws_resources.get_subnets_ids_for_vpc(
+            ec2_client=ec2_client,
+            vpc_id="vpc-1",
+            allocate_public_ip=True,
+        )
+        assert subnets_ids == ["subnet-1"]
+        assert ec2_client.describe_route_tables.call_count == 1
+
+    def test_returns_subnets_behind_nat(self):
+        ec2_client = _make_ec2_client_mock()
+        ec2_client.describe_subnets.return_value = {
+            "Subnets": [
+                {"SubnetId": "subnet-1"},
+                {"SubnetId": "subnet-2"},
+            ]
+        }
+        ec2_client.describe_route_tables.return_value = {
+            "RouteTables": [
+                {
+                    "Associations": [{"SubnetId": "subnet-1"}],
+                    "Routes": [{"GatewayId": "igw-1"}],
+                },
+                {
+                    "Associations": [{"Main": True}],
+                    "Routes": [{"NatGatewayId": "nat-1"}],
+                },
+            ]
+        }
+        subnets_ids = aws_resources.get_subnets_ids_for_vpc(
+            ec2_client=ec2_client,
+            vpc_id="vpc-1",
+            allocate_public_ip=False,
+        )
+        # subnet-2 is implicitly associated with the main route table
+        assert subnets_ids == ["subnet-2"]
+
+
+class TestGetDefaultVpcId:
+    def test_caches_vpc_id_per_region(self):
+        ec2_client = _make_ec2_client_mock()
+        ec2_client.describe_vpcs.return_value = {"Vpcs": [{"VpcId": "vpc-1"}]}
+        assert aws_resources.get_default_vpc_id(ec2_client) == "vpc-1"
+        assert aws_resources.get_default_vpc_id(ec2_client) == "vpc-1"
+        assert ec2_client.describe_vpcs.call_count == 1
+
+    def test_does_not_share_cache_with_lookup_by_name(self):
+        ec2_client = _make_ec2_client_mock()
+        ec2_client.describe_vpcs.return_value = {"Vpcs": [{"VpcId": "vpc-1"}]}
+        assert aws_resources.get_default_vpc_id(ec2_client) == "vpc-1"
+        assert aws_resources.get_vpc_id_by_name(ec2_client, vpc_name="my-vpc") == "vpc-1"
+        assert ec2_client.describe_vpcs.call_count == 2
+
+    def test_does_not_share_cache_between_accounts(self):
+        ec2_client_1 = _make_ec2_client_mock()
+        ec2_client_1.describe_vpcs.return_value = {"Vpcs": [{"VpcId": "vpc-1"}]}
+        ec2_client_2 = _make_ec2_client_mock()
+        ec2_client_2.describe_vpcs.return_value = {"Vpcs": [{"VpcId": "vpc-2"}]}
+        assert aws_resources.get_default_vpc_id(ec2_client_1, account_key="AKIA1") == "vpc-1"
+        assert aws_resources.get_default_vpc_id(ec2_client_2, account_key="AKIA2") == "vpc-2"
+
+
+class TestCreateInstancesStruct:
+    def test_builds_independent_structs(self):
+        def make_struct(disk_size: int) -> dict:
+            return aws_resources.create_instances_struct(
+                disk_size=disk_size,
+                image_id="ami-1",
+                instance_type="t2.micro",
+                iam_instance_profile_arn=None,
+                user_data="user_data",
+                tags=[{"Key": "owner", "Value": "dstack"}],
+                security_group_id="sg-1",
+                spot=True,
+                subnet_id="subnet-1",
+            )
+
+        struct_1 = make_struct(disk_size=100)
+        struct_2 = make_struct(disk_size=200)
+        assert struct_1["BlockDeviceMappings"][0]["Ebs"]["VolumeSize"] == 100
+        assert struct_2["BlockDeviceMappings"][0]["Ebs"]["VolumeSize"] == 200
+        assert struct_1["InstanceMarketOptions"]["MarketType"] == "spot"
+        assert struct_1["NetworkInterfaces"][0]["Groups"] == ["sg-1"]
+        assert "SecurityGroupIds" not in struct_1
+        struct_1["InstanceMarketOptions"]["SpotOptions"]["SpotInstanceType"] = "persistent"
+        struct_3 = make_struct(disk_size=100)
+        assert struct_3["InstanceMarketOptions"]["SpotOptions"]["SpotInstanceType"] == "one-time"
+
+    def test_uses_security_group_ids_without_subnet(self):
+        struct = aws_resources.create_instances_struct(
+            disk_size=100,
+            image_id="ami-1",
+            instance_type="t2.micro",
+            iam_instance_profile_arn=None,
+            user_data="user_data",
+            tags=[],
+            security_group_id="sg-1",
+            spot=False,
+        )
+        assert struct["SecurityGroupIds"] == ["sg-1"]
+        assert "NetworkInterfaces" not in struct
+        assert "InstanceMarketOptions" not in struct
+
+
+class TestGetGatewayImageId:
+    def test_caches_image_id_per_region(self):
+        ec2_client = _make_ec2_client_mock()
+        ec2_client.describe_images.return_value = {
+            "Images": [
+                {"ImageId": "ami-1", "State": "available", "CreationDate": "2024-01-01"},
+            ]
+        }
+        assert aws_resources.get_gateway_image_id(ec2_client) == "ami-1"
+        assert aws_resources.get_gateway_image_id(ec2_client) == "ami-1"
+        assert ec2_client.describe_images.call_count == 1